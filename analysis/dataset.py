@@ -0,0 +1,203 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from model.economy import get_backup
+
+
+INDEX_FILE = "index.json"
+
+
+class DatasetWriter:
+
+    """
+    Flatten the backups of several runs together with their parameters into a columnar dataset:
+    one .npy file per column, in one folder per partition, plus an index (json) describing the partitions.
+    """
+
+    def __init__(self, folder, window=10, partition_by=None):
+
+        self.folder = os.path.expanduser(folder)
+        self.window = window
+        self.partition_by = partition_by
+
+    def get_row(self, parameters, backup):
+
+        row = dict()
+
+        # ----- Parameters ----- #
+
+        row["agent_model"] = parameters["agent_model"].name
+        row["t_max"] = parameters["t_max"]
+        row["seed"] = parameters.get("seed") if parameters.get("seed") is not None else -1
+        row["n_agent"] = sum(parameters["repartition_of_roles"])
+        row["backup_stride"] = parameters.get("backup_stride", 1)
+
+        for k, v in (parameters.get("cognitive_parameters") or {}).items():
+            row[k] = v
+
+        for i, v in enumerate(parameters["storing_costs"]):
+            row["storing_costs_{}".format(i)] = v
+
+        for i, v in enumerate(parameters["repartition_of_roles"]):
+            row["repartition_of_roles_{}".format(i)] = v
+
+        # ----- Averages over the final window ----- #
+
+        # The window is in time steps, whereas only one time step out of 'backup_stride' is recorded
+        n = max(1, int(np.ceil(self.window / row["backup_stride"])))
+
+        row["consumption"] = np.mean(backup["consumption"][-n:])
+        row["n_exchanges"] = np.mean(backup["n_exchanges"][-n:])
+
+        for i, v in enumerate(np.mean(backup["good_accepted_as_medium"][-n:], axis=0)):
+            row["good_accepted_as_medium_{}".format(i)] = v
+
+        for key in backup["exchanges"][0].keys():
+            row["exchanges_{}_{}".format(*key)] = np.mean([e[key] for e in backup["exchanges"][-n:]])
+
+        proportions = np.mean(backup["proportions"][-n:], axis=0)
+        for i, j in np.ndindex(proportions.shape):
+            row["proportions_{}_{}".format(i, j)] = proportions[i, j]
+
+        return row
+
+    @staticmethod
+    def get_columns(rows):
+
+        columns = dict()
+
+        keys = sorted(set(k for row in rows for k in row.keys()))
+        for k in keys:
+            values = [row.get(k) for row in rows]
+            if any(isinstance(v, str) for v in values):
+                columns[k] = np.array(["" if v is None else v for v in values])
+            else:
+                # Runs with fewer goods have no value for some columns
+                columns[k] = np.array([np.nan if v is None else v for v in values])
+
+        return columns
+
+    def clear(self):
+
+        # Remove the partitions of a previous export, so that none of its columns is read as data
+        index_file = os.path.join(self.folder, INDEX_FILE)
+
+        if os.path.exists(index_file):
+
+            with open(index_file, 'r') as f:
+                index = json.load(f)
+
+            for p in index["partitions"]:
+                shutil.rmtree(os.path.join(self.folder, p["path"]), ignore_errors=True)
+
+            os.remove(index_file)
+
+    def write(self, runs):
+
+        self.clear()
+
+        rows = [self.get_row(parameters=p, backup=get_backup(b)) for p, b in runs]
+
+        # Group the runs by value of the partition key
+        partitions = dict()
+        for row in rows:
+            value = row[self.partition_by] if self.partition_by is not None else None
+            if isinstance(value, np.generic):
+                value = value.item()
+            partitions.setdefault(value, []).append(row)
+
+        index = {
+            "partition_by": self.partition_by,
+            "window": self.window,
+            "columns": sorted(set(k for row in rows for k in row.keys())),
+            "partitions": []
+        }
+
+        for i, (value, partition_rows) in enumerate(partitions.items()):
+
+            path = "part{}".format(i)
+            shutil.rmtree(os.path.join(self.folder, path), ignore_errors=True)
+            os.makedirs(os.path.join(self.folder, path))
+
+            for k, v in self.get_columns(partition_rows).items():
+                np.save(os.path.join(self.folder, path, "{}.npy".format(k)), v)
+
+            index["partitions"].append({"path": path, "value": value, "n_runs": len(partition_rows)})
+
+        with open(os.path.join(self.folder, INDEX_FILE), 'w') as f:
+            json.dump(index, f, indent=2)
+
+        return index
+
+
+def export_dataset(runs, folder, window=10, partition_by=None):
+
+    """
+    :param runs: iterable of (parameters, backup) pairs, the backup being possibly the name of a spill file
+    :param folder: where to write the dataset
+    :param window: number of final time steps over which summary columns are averaged
+    :param partition_by: name of a column (e.g. 'temp') according to which the runs are split in partitions
+    """
+
+    w = DatasetWriter(folder=folder, window=window, partition_by=partition_by)
+    return w.write(runs)
+
+
+def _match(values, condition):
+
+    if callable(condition):
+        return np.asarray(condition(values), dtype=bool)
+    return values == condition
+
+
+def _load(folder, partition, column):
+
+    file_name = os.path.join(folder, partition["path"], "{}.npy".format(column))
+
+    # A column of the index can be absent from a partition (e.g. runs with fewer goods)
+    if not os.path.exists(file_name):
+        return np.full(partition["n_runs"], np.nan)
+
+    return np.load(file_name, mmap_mode='r')
+
+
+def query(folder, columns, **conditions):
+
+    """
+    Read only the needed columns (and partitions) of a dataset written by 'export_dataset'.
+    Conditions are either values (equality) or functions taking an array and returning a boolean mask,
+    e.g. query('data/sweep', ['consumption', 'storing_costs_3'], temp=0.01).
+    """
+
+    folder = os.path.expanduser(folder)
+
+    with open(os.path.join(folder, INDEX_FILE), 'r') as f:
+        index = json.load(f)
+
+    unknown = [k for k in list(columns) + list(conditions.keys()) if k not in index["columns"]]
+    if unknown:
+        raise KeyError("Unknown column(s): {}".format(", ".join(unknown)))
+
+    conditions = conditions.copy()
+    partitions = index["partitions"]
+
+    # Skip the partitions that cannot match
+    if index["partition_by"] in conditions:
+        condition = conditions.pop(index["partition_by"])
+        partitions = [p for p in partitions if _match(np.asarray(p["value"]), condition)]
+
+    results = {k: [] for k in columns}
+
+    for p in partitions:
+
+        mask = np.ones(p["n_runs"], dtype=bool)
+        for k, condition in conditions.items():
+            mask &= _match(_load(folder=folder, partition=p, column=k), condition)
+
+        for k in columns:
+            results[k].append(_load(folder=folder, partition=p, column=k)[mask])
+
+    return {k: np.concatenate(v) if len(v) else np.array([]) for k, v in results.items()}
@@ -2,12 +2,16 @@ import numpy as np
 import os
 import matplotlib.pyplot as plt
 
+from model.economy import get_backup
+
 
 
 class GraphicDesigner:
 
     def __init__(self, backup, parameters, folder):
-        
+
+        backup = get_backup(backup)
+
         self.exchanges_list = backup["exchanges"]
         self.mean_utility_list = backup["consumption"]
         self.n_exchanges_list = backup["n_exchanges"]
@@ -45,7 +49,8 @@ class GraphicDesigner:
         n_lines = 2
         n_columns = 3
         
-        x = np.arange(self.parameters["t_max"])
+        # Only one time step out of 'backup_stride' is recorded
+        x = np.arange(0, self.parameters["t_max"], self.parameters.get("backup_stride", 1))
 
         # First subplot
         ax = plt.subplot(n_lines, n_columns, 1)
@@ -55,7 +60,7 @@ class GraphicDesigner:
         y = []
         for i in range(len(type_of_exchanges)):
             y.append([])
-        for t in range(self.parameters["t_max"]):
+        for t in range(len(x)):
             for exchange_idx in range(len(type_of_exchanges)):
                 y[exchange_idx].append(self.exchanges_list[t][type_of_exchanges[exchange_idx]])
 
@@ -149,7 +154,7 @@ class GraphicDesigner:
         n_lines = self.n_goods
         n_columns = 1
 
-        x = np.arange(len(self.proportions))
+        x = np.arange(0, self.parameters["t_max"], self.parameters.get("backup_stride", 1))
 
         for agent_type in range(self.n_goods):
 
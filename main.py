@@ -2,7 +2,7 @@ import argparse
 import os
 import pickle
 
-from model.economy import Economy
+from model.economy import Economy, get_backup
 from model.frequentist import FrequentistAgent
 from analysis.graph import represent_results
 
@@ -27,7 +27,7 @@ def produce_data():
         **parameters
     )
 
-    return parameters, e.run()
+    return parameters, get_backup(e.run())
 
 
 def main(args):
@@ -1,18 +1,28 @@
 import numpy as np
 from tqdm import tqdm
 import itertools as it
+import os
+import pickle
+import struct
+import sys
+from model.utils import get_rng
+from model.memory import get_size
 
 
 class Economy(object):
 
     def __init__(self, repartition_of_roles, t_max, storing_costs, agent_model,
-                 cognitive_parameters=None):
+                 cognitive_parameters=None, seed=None, backup_stride=1, spill_file=None, spill_every=None):
 
         self.t_max = t_max
         self.cognitive_parameters = cognitive_parameters
         self.storing_costs = storing_costs
         self.agent_model = agent_model
 
+        # If a seed is given, pairing and decisions use their own random streams
+        self.seed = seed
+        self.rng = get_rng(seed=seed, stream="pairing")
+
         self.n_goods = len(storing_costs)
         self.roles = self.get_roles(self.n_goods)
         self.repartition_of_roles = np.asarray(repartition_of_roles)
@@ -20,6 +30,20 @@ class Economy(object):
 
         self.agents = None
 
+        self.t = 0
+
+        # ----- Memory management ----- #
+
+        # Record only one time step out of 'backup_stride'
+        self.backup_stride = backup_stride
+
+        # If a spill file is given, recorded time steps are dumped into it (by chunks of 'spill_every')
+        if spill_every is not None and spill_file is None:
+            raise ValueError("'spill_every' requires a 'spill_file'.")
+
+        self.spill_file = spill_file
+        self.spill_every = spill_every
+
         # ----- For backup at t ----- #
 
         self.exchanges = dict()
@@ -70,7 +94,8 @@ class Economy(object):
                     prod=i, cons=j,
                     storing_costs=self.storing_costs,
                     cognitive_parameters=self.cognitive_parameters,
-                    idx=agent_idx)
+                    idx=agent_idx,
+                    rng=get_rng(seed=self.seed, stream="decision", idx=agent_idx))
 
                 agents.append(a)
                 agent_idx += 1
@@ -79,15 +104,31 @@ class Economy(object):
 
     def run(self):
 
+        if self.spill_file is not None:
+            if os.path.exists(self.spill_file):
+                os.remove(self.spill_file)
+            elif os.path.dirname(self.spill_file):
+                os.makedirs(os.path.dirname(self.spill_file), exist_ok=True)
+
         self.agents = self.create_agents()
         return self.play()
 
     def play(self):
 
-        for t in tqdm(range(self.t_max)):
+        pbar = tqdm(range(self.t_max))
+
+        for t in pbar:
 
             self.time_step()
 
+            if t % max(1, self.t_max // 100) == 0:
+                pbar.set_postfix(memory="{:.1f}MB".format(self.measure_bytes() / 1024 ** 2))
+
+        # If the backup has been spilled, return the name of the file where it is (see 'get_backup')
+        if self.spill_file is not None:
+            self.spill_backup()
+            return self.spill_file
+
         return self.back_up
 
     def time_step(self):
@@ -98,7 +139,7 @@ class Economy(object):
 
         # ---------- MANAGE EXCHANGES ----- #
         # Take a random order among the indexes of the agents.
-        agent_pairs = np.random.choice(self.n_agent, size=(self.n_agent // 2, 2), replace=False)
+        agent_pairs = self.rng.choice(self.n_agent, size=(self.n_agent // 2, 2), replace=False)
 
         for i, j in agent_pairs:
             self.make_encounter(i, j)
@@ -107,7 +148,10 @@ class Economy(object):
         for agent in self.agents:
             agent.consume()
 
-        self.make_a_backup_for_t()
+        if self.t % self.backup_stride == 0:
+            self.make_a_backup_for_t()
+
+        self.t += 1
 
     def compute_proportions(self):
 
@@ -152,6 +196,118 @@ class Economy(object):
         self.back_up["good_accepted_as_medium"].append(self.good_accepted_as_medium.copy())
         self.back_up["proportions"].append(self.proportions.copy())
 
+        if self.spill_every is not None and len(self.back_up["consumption"]) >= self.spill_every:
+            self.spill_backup()
+
+    def spill_backup(self):
+
+        if self.spill_file is None or not len(self.back_up["consumption"]):
+            return
+
+        with open(self.spill_file, 'ab') as f:
+            pickle.dump(self.back_up, f)
+
+        for v in self.back_up.values():
+            v.clear()
+
+    # ----- Memory footprint ----- #
+
+    def estimate_bytes_per_agent(self):
+
+        if hasattr(self.agent_model, "estimate_bytes"):
+            return self.agent_model.estimate_bytes(
+                storing_costs=self.storing_costs, cognitive_parameters=self.cognitive_parameters)
+
+        # Otherwise, measure an agent as created
+        i, j = self.roles[0]
+        a = self.agent_model(
+            prod=i, cons=j,
+            storing_costs=self.storing_costs,
+            cognitive_parameters=self.cognitive_parameters,
+            idx=0)
+        return get_size(a, seen={id(self.storing_costs), id(a.rng)})
+
+    def measure_bytes_per_agent(self):
+
+        if self.agents is None:
+            return None
+
+        # Measure one agent per type
+        sample = []
+        for agent_type in range(self.n_goods):
+            sample += [a for a in self.agents if a.C == agent_type][:1]
+
+        return np.mean([get_size(a, seen={id(self.storing_costs), id(a.rng)}) for a in sample])
+
+    def get_bytes_per_step(self, entry):
+
+        # Each recorded time step adds one element to each list of the backup
+        return get_size(entry) - sys.getsizeof(entry) + len(entry) * struct.calcsize('P')
+
+    def estimate_bytes_per_step(self):
+
+        # Same containers and same types of values as in 'make_a_backup_for_t'
+        exchanges = self.exchanges.copy()
+        for i, k in enumerate(exchanges.keys()):
+            exchanges[k] = i + 0.5
+
+        entry = [
+            exchanges,
+            0.5,
+            int(self.n_agent // 2),
+            self.good_accepted_as_medium.copy(),
+            self.proportions.copy()
+        ]
+
+        return self.get_bytes_per_step(entry)
+
+    def measure_bytes_per_step(self):
+
+        if not len(self.back_up["consumption"]):
+            return None
+
+        return self.get_bytes_per_step([v[-1] for v in self.back_up.values()])
+
+    def get_n_recorded_steps(self):
+
+        # Maximum number of time steps kept in memory during the run
+        n = int(np.ceil(self.t_max / self.backup_stride))
+
+        if self.spill_every is not None:
+            n = min(n, self.spill_every)
+
+        return n
+
+    def measure_bytes(self):
+
+        if self.agents is None:
+            return None
+
+        return \
+            self.n_agent * self.measure_bytes_per_agent() + \
+            len(self.back_up["consumption"]) * (self.measure_bytes_per_step() or 0)
+
+    def memory_report(self):
+
+        """
+        Estimated and measured (if the run began) bytes per agent and per recorded time step
+        """
+
+        report = {
+            "estimated_bytes_per_agent": self.estimate_bytes_per_agent(),
+            "measured_bytes_per_agent": self.measure_bytes_per_agent(),
+            "estimated_bytes_per_step": self.estimate_bytes_per_step(),
+            "measured_bytes_per_step": self.measure_bytes_per_step(),
+        }
+
+        report["estimated_bytes"] = \
+            self.n_agent * report["estimated_bytes_per_agent"] + \
+            self.get_n_recorded_steps() * report["estimated_bytes_per_step"]
+
+        report["measured_bytes"] = self.measure_bytes()
+
+        return report
+
     def reinitialize_backup_containers(self):
 
         # Containers for future backup
@@ -213,3 +369,39 @@ class Economy(object):
 def launch(**kwargs):
     e = Economy(**kwargs)
     return e.run()
+
+
+def get_backup(backup):
+
+    """
+    Backup returned by 'Economy.run': either the backup itself or the name of the file where it has been spilled
+    """
+
+    if isinstance(backup, str):
+        return load_backup(backup)
+
+    return backup
+
+
+def load_backup(file_name):
+
+    """
+    Gather the chunks of a backup spilled into a file
+    """
+
+    back_up = None
+
+    with open(file_name, 'rb') as f:
+        while True:
+            try:
+                chunk = pickle.load(f)
+            except EOFError:
+                break
+
+            if back_up is None:
+                back_up = chunk
+            else:
+                for k, v in chunk.items():
+                    back_up[k] += v
+
+    return back_up
@@ -1,13 +1,14 @@
 import numpy as np
 import itertools as it
 from model.utils import softmax
+from model.memory import get_size
 
 
 class FrequentistAgent(object):
 
     name = "Frequentist Agent"
 
-    def __init__(self, prod, cons, storing_costs, cognitive_parameters, idx):
+    def __init__(self, prod, cons, storing_costs, cognitive_parameters, idx, rng=None):
 
         self.P = prod
         self.C = cons
@@ -17,6 +18,9 @@ class FrequentistAgent(object):
 
         self.idx = idx
 
+        # Random stream for decisions (global numpy random state by default)
+        self.rng = rng if rng is not None else np.random
+
         self.n_goods = len(storing_costs)
 
         self.consumption = 0
@@ -34,6 +38,28 @@ class FrequentistAgent(object):
         self.in_hand_partner_good_pair = None
         self.accept = None
 
+    @classmethod
+    def estimate_bytes(cls, storing_costs, cognitive_parameters):
+
+        """
+        Size in bytes of an agent whose memories are full (shared objects not included)
+        """
+
+        n_goods = len(storing_costs)
+
+        a = cls(prod=0, cons=n_goods - 1, storing_costs=storing_costs,
+                cognitive_parameters=cognitive_parameters, idx=0)
+
+        # Encounters are memorized for every pair, acceptance only for pairs starting by the production good
+        for k in a.memory_encounter.keys():
+            a.memory_encounter[k] = [0 for _ in range(a.memory_span)]
+            a.encounter[k] = np.float64(a.encounter[k])
+            if k[0] == a.P:
+                a.memory_acceptance[k] = [0 for _ in range(a.memory_span)]
+                a.acceptance[k] = np.float64(a.acceptance[k])
+
+        return get_size(a, seen={id(storing_costs), id(a.rng)})
+
     @staticmethod
     def get_acceptance_or_encounter_dic(n_goods):
 
@@ -98,7 +124,7 @@ class FrequentistAgent(object):
 
         p = softmax(v, temp=self.temp)
 
-        return np.random.choice(np.array([0, 1]), p=p)
+        return self.rng.choice(np.array([0, 1]), p=p)
 
     def consume(self):
 
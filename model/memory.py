@@ -0,0 +1,170 @@
+import os
+import sys
+import types
+
+import numpy as np
+
+
+def get_size(obj, seen=None):
+
+    """
+    Size in bytes of an object and of everything it refers to (each object being counted once).
+    Objects whose id is in 'seen' (e.g. shared between agents) are not counted.
+    """
+
+    if seen is None:
+        seen = set()
+
+    if id(obj) in seen or isinstance(obj, (types.ModuleType, type)):
+        return 0
+
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(get_size(k, seen) + get_size(v, seen) for k, v in obj.items())
+
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(get_size(i, seen) for i in obj)
+
+    elif hasattr(obj, "__dict__") and not isinstance(obj, np.ndarray):
+        size += get_size(vars(obj), seen)
+
+    return size
+
+
+def plan_run(parameters, memory_budget, n_runs=1, max_workers=None, allow_spill=True, max_stride=None,
+             min_spill_every=100, spill_folder=None, overhead=100 * 1024 ** 2):
+
+    """
+    Choose the number of parallel workers, the backup stride and the spill settings
+    such that running 'n_runs' economies with these parameters fits in 'memory_budget' (bytes).
+    Spilling the backup to disk is preferred over recording less time steps, and less workers are preferred
+    over spilling by chunks smaller than 'min_spill_every' recorded steps (accepted with a single worker).
+    Each run gets its own spill file (in 'spill_folder' if given, relative names otherwise; the folder is
+    created when the runs start, not here); any 'spill_file' or 'spill_every' in the parameters is replaced.
+    :param overhead: bytes used by each worker independently of the economy (interpreter, libraries)
+    """
+
+    # Avoid circular import
+    from model.economy import Economy
+
+    e = Economy(**{k: v for k, v in parameters.items() if k not in ("spill_file", "spill_every")})
+
+    bytes_per_agent = e.estimate_bytes_per_agent()
+    bytes_per_step = e.estimate_bytes_per_step()
+    agents_bytes = e.n_agent * bytes_per_agent
+
+    n_recorded = int(np.ceil(e.t_max / e.backup_stride))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    for n_workers in range(max(1, min(max_workers, n_runs)), 0, -1):
+
+        available = memory_budget // n_workers - overhead - agents_bytes
+        n_steps = int(available // bytes_per_step) if available > 0 else 0
+
+        if n_steps >= n_recorded:
+            plan = {"n_workers": n_workers, "backup_stride": e.backup_stride, "spill_every": None}
+
+        elif allow_spill and (n_steps >= min(min_spill_every, n_recorded) or (n_workers == 1 and n_steps >= 1)):
+            plan = {"n_workers": n_workers, "backup_stride": e.backup_stride, "spill_every": n_steps}
+
+        elif not allow_spill and n_steps >= 1:
+            backup_stride = max(e.backup_stride, int(np.ceil(e.t_max / n_steps)))
+            if max_stride is not None and backup_stride > max_stride:
+                continue
+            plan = {"n_workers": n_workers, "backup_stride": backup_stride, "spill_every": None}
+
+        else:
+            continue
+
+        if plan["spill_every"] is not None:
+            plan["spill_files"] = [
+                os.path.join(spill_folder or "", "run{}.p".format(i)) for i in range(n_runs)]
+        else:
+            plan["spill_files"] = None
+
+        n_in_memory = min(
+            int(np.ceil(e.t_max / plan["backup_stride"])),
+            plan["spill_every"] if plan["spill_every"] is not None else e.t_max)
+
+        plan["estimated_bytes_per_run"] = overhead + agents_bytes + n_in_memory * bytes_per_step
+        return plan
+
+    # Smallest footprint: a single worker keeping a single recorded step in memory
+    minimum = overhead + agents_bytes + bytes_per_step
+
+    if memory_budget < minimum:
+        raise MemoryError(
+            "A memory budget of {} bytes is too small for these parameters: a single run needs at least {} bytes "
+            "({} bytes missing).".format(memory_budget, minimum, minimum - memory_budget))
+
+    raise MemoryError(
+        "A memory budget of {} bytes requires a backup stride above the maximum stride ({}).".format(
+            memory_budget, max_stride))
+
+
+def main():
+
+    """
+    Check the memory accounting and the planning on a small economy
+    """
+
+    from model.economy import Economy
+    from model.frequentist import FrequentistAgent
+
+    parameters = {
+        "repartition_of_roles": [15, 15, 15, 15],
+        "agent_model": FrequentistAgent,
+        "storing_costs": [0.01, 0.04, 0.09, 0.12],
+        "cognitive_parameters": {"memory_span": 50, "temp": 0.01, "u": 1},
+        "t_max": 200,
+        "seed": 0
+    }
+
+    # ----- Estimated vs measured bytes ----- #
+
+    e = Economy(**parameters)
+    e.run()
+
+    report = e.memory_report()
+    print(report)
+
+    assert report["estimated_bytes_per_step"] >= report["measured_bytes_per_step"], \
+        "Bytes per step are under-estimated."
+
+    # ----- Planning at a tight budget ----- #
+
+    overhead = 100 * 1024 ** 2
+    parameters["t_max"] = 1000
+
+    e = Economy(**parameters)
+    agents_bytes = e.n_agent * e.estimate_bytes_per_agent()
+    bytes_per_step = e.estimate_bytes_per_step()
+
+    # Room for 50 recorded steps only
+    budget = overhead + agents_bytes + 50 * bytes_per_step
+
+    plan = plan_run(parameters, memory_budget=budget, overhead=overhead)
+    print(plan)
+    assert plan["n_workers"] == 1 and plan["spill_every"] == 50 and plan["backup_stride"] == 1
+    assert plan["spill_files"] == ["run0.p"]
+    assert plan["estimated_bytes_per_run"] <= budget
+
+    plan = plan_run(parameters, memory_budget=budget, overhead=overhead, allow_spill=False)
+    print(plan)
+    assert plan["n_workers"] == 1 and plan["spill_every"] is None and plan["backup_stride"] == 20
+    assert plan["estimated_bytes_per_run"] <= budget
+
+    try:
+        plan_run(parameters, memory_budget=overhead + agents_bytes, overhead=overhead)
+        raise AssertionError("No recorded step fits, a MemoryError was expected.")
+    except MemoryError as err:
+        print(err)
+
+
+if __name__ == "__main__":
+    main()
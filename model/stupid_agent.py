@@ -11,7 +11,7 @@ class StupidAgent(object):
     name = "Stupid agent"
 
     def __init__(self, prod, cons, storing_costs, u=1,  beta=0.9,
-                 agent_parameters=None, idx=None):
+                 agent_parameters=None, idx=None, rng=None):
 
         # Production object (integer in [0, 1, 2])
         self.P = prod
@@ -22,6 +22,9 @@ class StupidAgent(object):
         # Index of agent (more or less his name ; integer in [0, ..., n] with n : total number of agent)
         self.idx = idx
 
+        # Random stream for decisions (global numpy random state by default)
+        self.rng = rng if rng is not None else np.random
+
         # Parameters for agent that could be different in nature depending on the agent model in use (Python dictionary)
         self.agent_parameters = agent_parameters
 
@@ -44,7 +47,7 @@ class StupidAgent(object):
         if partner_good == self.C:
             return True
         else:
-            return np.random.choice([True, False])
+            return self.rng.choice([True, False])
 
     def consume(self):
 
@@ -1,5 +1,23 @@
 import numpy as np
 
 
+# Names of the random streams: one for the pairing of agents, one per agent for its decisions
+STREAMS = {"pairing": 0, "decision": 1}
+
+
 def softmax(x, temp):
     return np.exp(x / temp) / np.sum(np.exp(x / temp))
+
+
+def get_rng(seed, stream, idx=0):
+
+    """
+    Random stream identified by its name (and by an index, e.g. the index of the agent).
+    For a same seed, a same stream gives the same random numbers whatever the other parameters are
+    (common random numbers). If seed is None, the global numpy random state is used.
+    """
+
+    if seed is None:
+        return np.random
+
+    return np.random.default_rng(np.random.SeedSequence(entropy=seed, spawn_key=(STREAMS[stream], idx)))